@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures CES message rate and CPU against the upstream aggregation window.
+
+Feeds 20 ms Genesys frames, alternating one second of silence and one second
+of speech-level noise, through the upstream path into a CES websocket stand-in
+and reports the CES messages per second of audio and the event loop thread CPU
+time per second of audio for each window (0 = one message per frame):
+
+    python -m benchmarks.aggregation_bench --seconds 60 --windows 0,20,40,60,100
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+from websockets.connection import State
+
+from src import config
+from src.aggregator import FrameAggregator
+from src.ces_ws import CESWS
+
+_FRAME_BYTES = 160  # 20 ms of 8 kHz PCMU.
+_SILENCE = b"\xff" * _FRAME_BYTES
+
+
+class _CESWebSocket:
+    """Writes each message to a local socket to include the per-send syscall."""
+
+    state = State.OPEN
+
+    def __init__(self):
+        self.messages = 0
+        self._sock, self._peer = socket.socketpair()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        while self._peer.recv(65536):
+            pass
+
+    async def send(self, message, text=None):
+        self.messages += 1
+        self._sock.sendall(message)
+
+    def close(self):
+        self._sock.close()
+
+
+async def _run(window_ms, seconds):
+    ces_ws = CESWS(None)
+    ces_ws.websocket = _CESWebSocket()
+    aggregator = None
+    if window_ms:
+        aggregator = FrameAggregator(
+            ces_ws.send_audio, window_ms, window_ms, config.AUDIO_ONSET_RMS
+        )
+    speech = os.urandom(_FRAME_BYTES)
+    frames = int(seconds * 50)
+
+    start = time.thread_time()
+    for i in range(frames):
+        frame = speech if (i // 50) % 2 else _SILENCE
+        if aggregator:
+            await aggregator.add(frame)
+        else:
+            await ces_ws.send_audio(frame)
+    if aggregator:
+        await aggregator.flush()
+    cpu = time.thread_time() - start
+    ces_ws.websocket.close()
+    return ces_ws.websocket.messages / seconds, cpu / seconds * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--windows", default="0,20,40,60,100")
+    args = parser.parse_args()
+
+    for window_ms in (int(w) for w in args.windows.split(",")):
+        messages_per_s, cpu_ms_per_s = await _run(window_ms, args.seconds)
+        print(
+            f"window {window_ms:4d} ms  {messages_per_s:6.1f} msg/s  "
+            f"{cpu_ms_per_s:6.3f} ms CPU per audio second"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the session state handoff used during rolling deploys.
+
+Builds sessions with live resampler state, then times saving every snapshot
+to the store (the draining instance) and loading and restoring them (the
+replacement instance), excluding network time to Genesys and CES:
+
+    python -m benchmarks.handoff_bench --sessions 100 --store file
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import time
+
+from src import transcoder
+from src.ces_ws import CESWS
+from src.genesys_ws import GenesysWS
+from src.session_store import FileSessionStore, InMemorySessionStore
+
+
+def _live_session(index):
+    genesys_ws = GenesysWS(None)
+    genesys_ws.client_session_id = f"session-{index}"
+    genesys_ws.last_server_sequence_number = 42
+    genesys_ws.ces_ws = ces_ws = CESWS(genesys_ws)
+    ces_ws.session_id = f"projects/p/locations/l/apps/a/sessions/{index}"
+    _, ces_ws.ratecv_state_to_va = transcoder.ulaw_to_ces(
+        os.urandom(160), None, transcoder.AudioMessageBuffer()
+    )
+    _, ces_ws.ratecv_state_to_genesys = transcoder.ces_to_ulaw(
+        base64.b64encode(os.urandom(640)), None
+    )
+    return genesys_ws
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--store", choices=("memory", "file"), default="file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        if args.store == "file":
+            store = FileSessionStore(path)
+        else:
+            store = InMemorySessionStore()
+        sessions = [_live_session(i) for i in range(args.sessions)]
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(store.save(s.client_session_id, s.snapshot()) for s in sessions)
+        )
+        drained = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for session in sessions:
+            resumed = GenesysWS(None)
+            resumed.ces_ws = CESWS(resumed)
+            resumed.restore(await store.load(session.client_session_id))
+            await store.delete(session.client_session_id)
+        restored = time.perf_counter() - start
+
+    state_bytes = len(json.dumps(sessions[0].snapshot()))
+    print(f"{args.sessions} sessions, {args.store} store, ~{state_bytes} bytes each")
+    print(f"drain    {drained * 1000:8.1f} ms total")
+    print(
+        f"restore  {restored * 1000:8.1f} ms total, "
+        f"{restored / args.sessions * 1000:.2f} ms per session"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
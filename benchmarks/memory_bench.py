@@ -0,0 +1,146 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures memory per session and transient allocations per audio frame.
+
+Reports the memory retained by one GenesysWS/CESWS pair, both idle and
+opened (pacer queue created and one upstream frame sent), next to the same
+pair in the original layout of plain instance dicts and an asyncio.Queue.
+Then reports the peak transient allocation of turning one 20 ms Genesys frame
+into the bytes sent to CES, for the json.dumps() envelope the adapter used to
+build and for the reusable AudioMessageBuffer:
+
+    python -m benchmarks.memory_bench --sessions 1000
+"""
+
+import argparse
+import asyncio
+import audioop
+import base64
+import json
+import os
+import tracemalloc
+
+from src import transcoder
+from src.ces_ws import CESWS
+from src.genesys_ws import GenesysWS
+
+
+def _json_envelope(mulaw_audio, ratecv_state):
+    linear_audio_8k = audioop.ulaw2lin(mulaw_audio, 2)
+    linear_audio_16k, ratecv_state = audioop.ratecv(
+        linear_audio_8k, 2, 1, 8000, 16000, ratecv_state
+    )
+    payload = base64.b64encode(linear_audio_16k).decode("utf-8")
+    message = json.dumps({"realtimeInput": {"audio": payload}})
+    # websockets encodes str messages to UTF-8 before framing them.
+    return message.encode("utf-8"), ratecv_state
+
+
+class _BaselineGenesysWS:
+    """GenesysWS as it was laid out before __slots__."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.ces_ws = None
+        self.last_server_sequence_number = 0
+        self.last_client_sequence_number = 0
+        self.client_session_id = None
+        self.conversation_id = None
+        self.input_variables = None
+
+
+class _BaselineCESWS:
+    """CESWS as it was laid out before __slots__ and lazy allocation."""
+
+    def __init__(self, genesys_ws):
+        self.genesys_ws = genesys_ws
+        self.websocket = None
+        self.session_id = None
+        self.deployment_id = None
+        self.ratecv_state_to_va = None
+        self.ratecv_state_to_genesys = None
+        self.audio_out_queue = asyncio.Queue()
+
+
+def _open_baseline(ces_ws, mulaw_frame):
+    _, ces_ws.ratecv_state_to_va = _json_envelope(mulaw_frame, None)
+
+
+def _open_current(ces_ws, mulaw_frame):
+    ces_ws.get_audio_out_queue()
+    ces_ws.message_buffer = transcoder.AudioMessageBuffer()
+    _, ces_ws.ratecv_state_to_va = transcoder.ulaw_to_ces(
+        mulaw_frame, None, ces_ws.message_buffer
+    )
+
+
+def _session_bytes(sessions, genesys_ws_class, ces_ws_class, open_session=None):
+    mulaw_frame = os.urandom(160)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    live = []
+    for _ in range(sessions):
+        genesys_ws = genesys_ws_class(None)
+        genesys_ws.ces_ws = ces_ws_class(genesys_ws)
+        if open_session:
+            open_session(genesys_ws.ces_ws, mulaw_frame)
+        live.append(genesys_ws)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions
+
+
+def _frame_bytes(render, frames):
+    mulaw_frame = os.urandom(160)
+    ratecv_state = None
+    render(mulaw_frame, ratecv_state)  # Warm up caches outside the measurement.
+    peaks = []
+    tracemalloc.start()
+    for _ in range(frames):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        _, ratecv_state = render(mulaw_frame, ratecv_state)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return sum(peaks) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=1000)
+    args = parser.parse_args()
+
+    for label, open_baseline, open_current in (
+        ("idle", None, None),
+        ("opened", _open_baseline, _open_current),
+    ):
+        baseline = _session_bytes(
+            args.sessions, _BaselineGenesysWS, _BaselineCESWS, open_baseline
+        )
+        current = _session_bytes(args.sessions, GenesysWS, CESWS, open_current)
+        print(f"session {label:<7}  baseline {baseline:6.0f}  current {current:6.0f}")
+
+    message_buffer = transcoder.AudioMessageBuffer()
+    pooled = _frame_bytes(
+        lambda audio, state: transcoder.ulaw_to_ces(audio, state, message_buffer),
+        args.frames,
+    )
+    envelope = _frame_bytes(_json_envelope, args.frames)
+    print(f"frame peak       json.dumps {envelope:6.0f}  buffer {pooled:6.0f}")
+
+
+if __name__ == "__main__":
+    main()
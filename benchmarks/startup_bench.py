@@ -0,0 +1,141 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the time from process start to the first session being ready.
+
+Starts `python -m src.main` in a subprocess and reports:
+
+* time until /health answers (the port is accepting connections), and
+* when --agent-id is given, time until a Genesys-style "open" gets its
+  "opened" reply, i.e. the first session is connected to CES.
+
+Run from the repository root, with the same environment the server needs
+(GENESYS_API_KEY, credentials). GENESYS_CLIENT_SECRET must be unset so the
+benchmark client does not need to sign its requests:
+
+    python -m benchmarks.startup_bench --agent-id projects/.../apps/...
+    PREWARM_ON_STARTUP=false python -m benchmarks.startup_bench --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import websockets
+
+
+async def _wait_for_health(port, deadline):
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            if b" 200 " in status_line:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.005)
+    raise TimeoutError("Server did not become healthy in time")
+
+
+async def _open_session(port, api_key, agent_id):
+    session_id = str(uuid.uuid4())
+    open_message = {
+        "version": "2",
+        "type": "open",
+        "id": session_id,
+        "seq": 1,
+        "serverseq": 0,
+        "parameters": {
+            "conversationId": str(uuid.uuid4()),
+            "media": [
+                {
+                    "type": "audio",
+                    "format": "PCMU",
+                    "channels": ["external"],
+                    "rate": 8000,
+                }
+            ],
+            "inputVariables": {"_agent_id": agent_id},
+        },
+    }
+    async with websockets.connect(
+        f"ws://127.0.0.1:{port}/", additional_headers={"x-api-key": api_key}
+    ) as websocket:
+        await websocket.send(json.dumps(open_message))
+        async for message in websocket:
+            if isinstance(message, str) and json.loads(message)["type"] == "opened":
+                return
+
+
+async def _run_once(args):
+    env = dict(os.environ, PORT=str(args.port))
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.main"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await _wait_for_health(args.port, start + args.timeout)
+        healthy = time.monotonic() - start
+        session_ready = None
+        if args.agent_id:
+            await asyncio.wait_for(
+                _open_session(args.port, env["GENESYS_API_KEY"], args.agent_id),
+                args.timeout,
+            )
+            session_ready = time.monotonic() - start
+        return healthy, session_ready
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _summary(label, samples_s):
+    samples_ms = [s * 1000 for s in samples_s]
+    print(
+        f"{label:<16} median {statistics.median(samples_ms):8.1f} ms  "
+        f"min {min(samples_ms):8.1f} ms  max {max(samples_ms):8.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--agent-id", help="Agent to open the first session on.")
+    args = parser.parse_args()
+
+    if not os.getenv("GENESYS_API_KEY"):
+        sys.exit("GENESYS_API_KEY must be set.")
+
+    results = [await _run_once(args) for _ in range(args.runs)]
+    _summary("health ok", [healthy for healthy, _ in results])
+    if args.agent_id:
+        _summary("session ready", [ready for _, ready in results])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
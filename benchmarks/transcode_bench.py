@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures the transcoding cost of concurrent calls on the event loop.
+
+Simulates concurrent calls, each sending a 20 ms PCMU frame upstream and
+receiving a 20 ms LINEAR16 frame downstream in real time, and reports the
+CPU time spent on the event loop thread, the CPU time of the whole process
+and the per-frame transcoding latency:
+
+    python -m benchmarks.transcode_bench --sessions 50 --seconds 5
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import time
+
+from src import transcoder
+
+_FRAME_S = 0.02
+
+
+class _Session:
+    __slots__ = ("ratecv_state_to_va", "ratecv_state_to_genesys", "message_buffer")
+
+    def __init__(self):
+        self.ratecv_state_to_va = None
+        self.ratecv_state_to_genesys = None
+        self.message_buffer = transcoder.AudioMessageBuffer()
+
+
+async def _call(frames, latencies):
+    session = _Session()
+    mulaw_frame = os.urandom(160)
+    ces_frame = base64.b64encode(os.urandom(640)).decode("utf-8")
+    next_frame = time.monotonic()
+    for _ in range(frames):
+        start = time.perf_counter()
+        _, session.ratecv_state_to_va = transcoder.ulaw_to_ces(
+            mulaw_frame, session.ratecv_state_to_va, session.message_buffer
+        )
+        _, session.ratecv_state_to_genesys = transcoder.ces_to_ulaw(
+            ces_frame, session.ratecv_state_to_genesys
+        )
+        latencies.append(time.perf_counter() - start)
+        next_frame += _FRAME_S
+        await asyncio.sleep(max(0, next_frame - time.monotonic()))
+
+
+async def _run(args):
+    frames = int(args.seconds / _FRAME_S)
+    latencies = []
+    loop_cpu_start = time.thread_time()
+    process_cpu_start = time.process_time()
+    await asyncio.gather(
+        *(_call(frames, latencies) for _ in range(args.sessions))
+    )
+    loop_cpu = time.thread_time() - loop_cpu_start
+    process_cpu = time.process_time() - process_cpu_start
+    latencies.sort()
+    return loop_cpu, process_cpu, latencies
+
+
+def _report(loop_cpu, process_cpu, latencies, args):
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(
+        f"loop CPU {loop_cpu / args.seconds * 100:6.1f} %  "
+        f"process CPU {process_cpu / args.seconds * 100:6.1f} %  "
+        f"latency p50 {p50:6.2f} ms  p99 {p99:6.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions, {args.seconds:.0f} s of audio each")
+    _report(*await _run(args), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
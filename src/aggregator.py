@@ -0,0 +1,134 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Aggregates upstream Genesys audio frames into fewer CES messages."""
+
+import asyncio
+import audioop
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 8 kHz PCMU is one byte per sample, so 8 bytes per millisecond.
+_BYTES_PER_MS = 8
+
+# Quiet audio needed before a loud frame counts as a new speech onset.
+_ONSET_HANGOVER_MS = 200
+
+# The onset check estimates the RMS from every 4th sample of the frame, which
+# is accurate enough to compare against a threshold and about a third cheaper.
+_ONSET_SAMPLE_STRIDE = 4
+
+
+class FrameAggregator:
+    """Coalesces PCMU frames and flushes them as one chunk.
+
+    Pending audio is flushed when it reaches window_ms, when the oldest
+    pending frame has waited deadline_ms, or immediately on speech onset: a
+    frame with an RMS of at least onset_rms after a stretch of quiet. Setting
+    onset_rms to 0 disables onset detection.
+
+    A frame that fills the window on its own is sent straight through. The
+    aggregator lowers the CES message rate, not CPU use: windows of one or two
+    frames cost slightly more CPU than sending every frame.
+    """
+
+    __slots__ = (
+        "_send",
+        "_window_bytes",
+        "_deadline",
+        "_onset_rms",
+        "_quiet_bytes",
+        "_pending",
+        "_timer",
+        "_deadline_flush",
+        "_lock",
+    )
+
+    def __init__(self, send, window_ms, deadline_ms, onset_rms):
+        self._send = send
+        self._window_bytes = window_ms * _BYTES_PER_MS
+        self._deadline = deadline_ms / 1000.0
+        self._onset_rms = onset_rms
+        self._quiet_bytes = _ONSET_HANGOVER_MS * _BYTES_PER_MS
+        self._pending = bytearray()
+        self._timer = None
+        self._deadline_flush = None
+        self._lock = asyncio.Lock()
+
+    def _is_onset(self, frame):
+        if not self._onset_rms:
+            return False
+        sample = frame[::_ONSET_SAMPLE_STRIDE]
+        if audioop.rms(audioop.ulaw2lin(sample, 2), 2) < self._onset_rms:
+            self._quiet_bytes += len(frame)
+            return False
+        onset = self._quiet_bytes >= _ONSET_HANGOVER_MS * _BYTES_PER_MS
+        self._quiet_bytes = 0
+        return onset
+
+    async def add(self, frame):
+        """Adds a frame, flushing if the window is full or speech starts."""
+        if (
+            len(frame) >= self._window_bytes
+            and not self._pending
+            and not self._lock.locked()
+        ):
+            # Nothing to coalesce with, so skip the buffer. The onset check only
+            # runs to keep the quiet counter right for the frames that follow.
+            self._is_onset(frame)
+            await self._send(frame)
+            return
+        self._pending += frame
+        if self._is_onset(frame) or len(self._pending) >= self._window_bytes:
+            await self.flush()
+        elif self._timer is None:
+            # A timer handle is much cheaper than a task to arm and cancel, and
+            # most windows fill up before their deadline.
+            self._timer = asyncio.get_running_loop().call_later(
+                self._deadline, self._on_deadline
+            )
+
+    def _on_deadline(self):
+        self._timer = None
+        self._deadline_flush = asyncio.create_task(self._flush_on_deadline())
+
+    async def _flush_on_deadline(self):
+        # Nobody awaits this task, so errors are logged here.
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing aggregated audio: {e}")
+
+    async def flush(self):
+        """Sends all pending audio as a single chunk."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._pending:
+                return
+            chunk = bytes(self._pending)
+            self._pending.clear()
+            await self._send(chunk)
+
+    def close(self):
+        """Drops pending audio and cancels the deadline timer and flush."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._deadline_flush is not None:
+            self._deadline_flush.cancel()
+            self._deadline_flush = None
+        self._pending.clear()
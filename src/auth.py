@@ -21,10 +21,6 @@ import logging
 import re
 import time
 
-import google.auth
-from google.auth.transport import requests as google_auth_requests
-from google.cloud import secretmanager
-
 from . import config
 
 logger = logging.getLogger(__name__)
@@ -34,7 +30,40 @@ class Auth:
     def __init__(self):
         self._token_info = {}
         self._lock = asyncio.Lock()
+        self._credentials_lock = asyncio.Lock()
         self._sm_client = None
+        self._credentials = None
+        self._project_id = None
+        self._auth_request = None
+
+    def _load_default_credentials(self):
+        # google.auth and its transport are only imported when ADC is actually
+        # used, keeping them off the import path of the token-based mode.
+        import google.auth
+        from google.auth.transport import requests as google_auth_requests
+
+        if self._credentials is None:
+            self._credentials, self._project_id = google.auth.default()
+            self._auth_request = google_auth_requests.Request()
+        return self._credentials
+
+    async def _get_credentials(self):
+        # Concurrent first callers share one google.auth.default() lookup.
+        if self._credentials is None:
+            async with self._credentials_lock:
+                if self._credentials is None:
+                    await asyncio.to_thread(self._load_default_credentials)
+        return self._credentials
+
+    async def get_project_id(self):
+        """Returns the ADC project id, resolving it once per process."""
+        await self._get_credentials()
+        return self._project_id
+
+    async def warm_up(self):
+        """Resolves credentials, project id and a first token ahead of traffic."""
+        await self.get_project_id()
+        await self.get_token()
 
     async def get_token(self):
         async with self._lock:
@@ -47,13 +76,16 @@ class Auth:
                 return self._token_info["access_token"]
             else:
                 # ADC-based auth
-                creds, _ = google.auth.default()
-                auth_req = google_auth_requests.Request()
-                creds.refresh(auth_req)
+                creds = await self._get_credentials()
+                if not creds.valid:
+                    logger.info("ADC token is missing or expired, refreshing.")
+                    await asyncio.to_thread(creds.refresh, self._auth_request)
                 return creds.token
 
     async def _fetch_token_from_secret_manager(self):
         if not self._sm_client:
+            from google.cloud import secretmanager
+
             self._sm_client = secretmanager.SecretManagerServiceClient()
 
         secret_path = config.AUTH_TOKEN_SECRET_PATH
@@ -13,28 +13,96 @@
 # limitations under the License.
 
 import asyncio
-import audioop
-import base64
+import collections
 import json
 import logging
+import random
+import ssl
+import time
 import uuid
 
-import google.auth
 import websockets
 from websockets.connection import State
 
+from . import config, transcoder
 from .auth import auth_provider
+from .dispatcher import MessageDispatcher, MessageStats
+from .greeting_cache import MAX_GREETING_BYTES, greeting_cache
 from .redaction import redact
 
 logger = logging.getLogger(__name__)
 
+_CES_HOST = "ces.googleapis.com"
 _BASE_WS_URL = (
-    "wss://ces.googleapis.com/ws/google.cloud.ces.v1.SessionService/"
+    f"wss://{_CES_HOST}/ws/google.cloud.ces.v1.SessionService/"
     "BidiRunSession/locations/"
 )
 
+# Built once and shared by every CES connection; loading the CA bundle is one
+# of the more expensive steps of the first TLS handshake.
+_ssl_context = None
+
+
+def get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+async def warm_up():
+    """Builds the shared TLS context before serving."""
+    await asyncio.to_thread(get_ssl_context)
+
+
+_dispatcher = MessageDispatcher()
+
+
+class _AudioOutQueue:
+    """An unbounded FIFO of audio chunks for the pacer, its only consumer.
+
+    asyncio.Queue keeps three deques and an Event, over 3 KB per session; the
+    pacer only needs the chunks and a single waiter.
+    """
+
+    __slots__ = ("_chunks", "_waiter")
+
+    def __init__(self):
+        self._chunks = collections.deque()
+        self._waiter = None
+
+    def put_nowait(self, chunk):
+        self._chunks.append(chunk)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self):
+        while not self._chunks:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._chunks.popleft()
+
 
 class CESWS:
+    __slots__ = (
+        "genesys_ws",
+        "websocket",
+        "session_id",
+        "deployment_id",
+        "ratecv_state_to_va",
+        "ratecv_state_to_genesys",
+        "audio_out_queue",
+        "message_buffer",
+        "greeting_key",
+        "greeting_chunks",
+        "greeting_bytes",
+        "greeting_skip_bytes",
+        "message_stats",
+    )
+
     def __init__(self, genesys_ws):
         self.genesys_ws = genesys_ws
         self.websocket = None
@@ -42,16 +110,59 @@ class CESWS:
         self.deployment_id = None
         self.ratecv_state_to_va = None
         self.ratecv_state_to_genesys = None
-        self.audio_out_queue = asyncio.Queue()
+        # Created when the pacer starts and on the first upstream frame, so
+        # sessions that never open do not pay for them.
+        self.audio_out_queue = None
+        self.message_buffer = None
+        # Greeting cache state: the chunks of the live greeting being recorded
+        # under greeting_key and their total size, and how much of the live
+        # greeting to drop because the cached copy was already played.
+        self.greeting_key = None
+        self.greeting_chunks = None
+        self.greeting_bytes = 0
+        self.greeting_skip_bytes = 0
+        # Created by the listener on the first CES message.
+        self.message_stats = None
+
+    def get_audio_out_queue(self):
+        if self.audio_out_queue is None:
+            self.audio_out_queue = _AudioOutQueue()
+        return self.audio_out_queue
 
     def is_connected(self):
         return self.websocket and self.websocket.state == State.OPEN
 
-    async def connect(self, agent_id, deployment_id=None):
-        self.session_id = f"{agent_id}/sessions/{uuid.uuid4()}"
+    def snapshot(self):
+        """Returns the state needed to resume this CES session elsewhere."""
+        return {
+            "sid": self.session_id,
+            "va": self.ratecv_state_to_va,
+            "gen": self.ratecv_state_to_genesys,
+        }
+
+    def restore(self, state):
+        """Restores a snapshot so that connect() resumes the same CES session."""
+        self.session_id = state["sid"]
+        self.ratecv_state_to_va = transcoder.ratecv_state_from_json(state["va"])
+        self.ratecv_state_to_genesys = transcoder.ratecv_state_from_json(state["gen"])
+
+    async def close(self):
+        if self.is_connected():
+            await self.websocket.close()
+
+    async def connect(self, agent_id, deployment_id=None, resume=None):
+        """Connects to CES and starts or resumes the session.
+
+        Args:
+            agent_id: The CES agent to connect to.
+            deployment_id: The CES deployment, if any.
+            resume: An awaitable that restores a handed-off session and returns
+                whether it did, or None. It is awaited after the handshake, so
+                the session store lookup overlaps the connection setup.
+        """
         self.deployment_id = deployment_id
 
-        _, project_id = google.auth.default()
+        project_id = await auth_provider.get_project_id()
 
         try:
             parts = agent_id.split("/")
@@ -68,15 +179,20 @@ class CESWS:
         logger.info(f"Connecting to CES at {ws_url}")
         self.websocket = await websockets.connect(
             ws_url,
+            ssl=get_ssl_context(),
             additional_headers={
                 "Authorization": f"Bearer {token}",
                 "X-Goog-User-Project": project_id,
             },
         )
         logger.info("Connected to CES")
-        await self.send_config_message()
+        # A restored session keeps its id and must not be greeted again.
+        resumed = resume is not None and await resume
+        if not resumed:
+            self.session_id = f"{agent_id}/sessions/{uuid.uuid4()}"
+        await self.send_config_message(kickstart=not resumed)
 
-    async def send_config_message(self):
+    async def send_config_message(self, kickstart=True):
         config_message = {
             "config": {
                 "session": self.session_id,
@@ -95,9 +211,10 @@ class CESWS:
         await self.websocket.send(json.dumps(config_message))
         logger.info(f"Sent config message to CES: {config_message}")
 
-        kickstart_message = {"realtimeInput": {"text": "Hello"}}
-        await self.websocket.send(json.dumps(kickstart_message))
-        logger.info(f"Sent kickstart message to CES: {kickstart_message}")
+        if kickstart:
+            kickstart_message = {"realtimeInput": {"text": "Hello"}}
+            await self.websocket.send(json.dumps(kickstart_message))
+            logger.info(f"Sent kickstart message to CES: {kickstart_message}")
 
         if self.genesys_ws.ces_input_variables:
             variables_message = {
@@ -107,90 +224,150 @@ class CESWS:
             redacted_variables_message = redact(variables_message)
             logger.info(f"Sent variables to CES: {redacted_variables_message}")
 
+    def play_cached_greeting(self, chunks):
+        """Queues a cached greeting and skips the same audio from the live one."""
+        for chunk in chunks:
+            self.get_audio_out_queue().put_nowait(chunk)
+        self.greeting_skip_bytes = sum(len(chunk) for chunk in chunks)
+
+    def record_greeting(self, key):
+        """Records the live greeting into the greeting cache under key."""
+        self.greeting_key = key
+        self.greeting_chunks = []
+        self.greeting_bytes = 0
+
+    def _track_greeting(self, data):
+        session_output = data.get("sessionOutput", {})
+        if "recognitionResult" in data:
+            # The caller spoke during the greeting, so the capture may be cut.
+            self.greeting_chunks = None
+        elif "turnCompleted" in session_output or "diagnosticInfo" in session_output:
+            if self.greeting_chunks:
+                greeting_cache.put(self.greeting_key, self.greeting_chunks)
+            self.greeting_chunks = None
+            self.greeting_skip_bytes = 0
+
     async def send_audio(self, audio_chunk):
-        linear_audio_8k = audioop.ulaw2lin(audio_chunk, 2)
-        linear_audio_16k, self.ratecv_state_to_va = audioop.ratecv(
-            linear_audio_8k, 2, 1, 8000, 16000, self.ratecv_state_to_va
+        if self.message_buffer is None:
+            self.message_buffer = transcoder.AudioMessageBuffer()
+        va_input, self.ratecv_state_to_va = transcoder.ulaw_to_ces(
+            audio_chunk, self.ratecv_state_to_va, self.message_buffer
         )
-        base64_pcm_payload = base64.b64encode(linear_audio_16k).decode("utf-8")
-        va_input = {"realtimeInput": {"audio": base64_pcm_payload}}
         if self.is_connected():
-            await self.websocket.send(json.dumps(va_input))
+            await self.websocket.send(va_input, text=True)
 
     async def listen(self):
         try:
-   
             while self.is_connected():
                 message = await self.websocket.recv()
                 data = json.loads(message)
-                
-
-                # custom logic
-
-
-                if "sessionOutput" in data and "audio" in data["sessionOutput"]:
-                    linear_audio_16k = base64.b64decode(data["sessionOutput"]["audio"])
-                    linear_audio_8k, self.ratecv_state_to_genesys = audioop.ratecv(
-                        linear_audio_16k,
-                        2,
-                        1,
-                        16000,
-                        8000,
-                        self.ratecv_state_to_genesys,
-                    )
-                    mulaw_audio = audioop.lin2ulaw(linear_audio_8k, 2)
-                    await self.audio_out_queue.put(mulaw_audio)
-
-                elif "sessionOutput" in data and "text" in data["sessionOutput"]:
-                    text = data['sessionOutput']['text']
-                    redacted_text = redact(text)
-                    logger.info(
-                        f"Received text from CES: {text} and data{data}"
-                    )
-                    if "end_session" in text.lower():
-                        logger.error(f"End Session as text in sessionOutput. Received text from CES text: {text}It shouldn't be here as this is text to be reat to the customer. Calling disconnect in Genesys with error returned")
-                        await self.genesys_ws.send_disconnect("completed", params="no_params_error_1")
-
-                elif "sessionOutput" in data and "diagnosticInfo" in data["sessionOutput"]:
-                    if "messages" in data["sessionOutput"]["diagnosticInfo"]:
-                        #data["sessionOutput"]["diagnosticInfo"]["messages"][0]["chunks"][1]["updatedVariables"]
-                        for message in data["sessionOutput"]["diagnosticInfo"]["messages"]:
-                            if "end_session" in message["chunks"][0]:
-                                logger.error(f"End Session in turn complete. It shouldn't be here  Received text from CES text: {text}It shouldn't be here as this is text to be reat to the customer. Calling disconnect in Genesys with error returned")
-                                await self.genesys_ws.send_disconnect("completed", params="no_params_error_2")                  
-                        #if "chunks" in data["sessionOutput"]["diagnosticInfo"]["messages"][0]:
-                        #    logger.warning(f"Received diagnosticInfo from CES: {data["sessionOutput"]["diagnosticInfo"]["messages"][0]["chunks"][1]["updatedVariables"]}")
-
-                            
-                elif "recognitionResult" in data:
-                    pass
-                # Implement your own logic here
-                elif "endSession" in data:
-                    logger.info(f"Received endSession from CES: {data}")
-                    #if "params" in data['endSession']['metadata'] and "conversation_summary" in data['endSession']['metadata']['params']:
-                    if "params" in data['endSession']['metadata']:
-                        # Juanan Dec 9 remove conv summary
-                        params = data['endSession']['metadata']['params']
-                        logger.warning(f"Received params from CES: {params}")
+                if self.message_stats is None:
+                    self.message_stats = MessageStats()
+
+                # Audio is most of the traffic, so it skips the handler table.
+                session_output = data.get("sessionOutput")
+                if session_output and "audio" in session_output:
+                    self.message_stats.count("audio")
+                    await self.handle_audio(session_output["audio"])
+                else:
+                    message_type, handler = _dispatcher.route(data)
+                    if handler is None:
+                        self.message_stats.count("unknown")
+                        logger.warning(f"Received unknown message from CES: {data}")
                     else:
-                        params = None
-                        
-                    await self.genesys_ws.send_disconnect("completed", params=params)
-                else: 
-                    logger.warning(f"Received unknown message from CES: {data}")
+                        start = time.perf_counter()
+                        try:
+                            await handler(self, data)
+                        except Exception as e:
+                            logger.error(
+                                f"Error handling {message_type} from CES: {e}",
+                                exc_info=True,
+                            )
+                        self.message_stats.record(message_type, start)
 
-                # end custom logic
+                if self.greeting_chunks is not None or self.greeting_skip_bytes:
+                    self._track_greeting(data)
 
         except Exception as e:
             logger.error(f"Error in CES listener: {e}")
+        if self.message_stats is not None:
+            logger.info(f"CES message stats: {self.message_stats.summary()}")
+
+    async def handle_audio(self, base64_audio):
+        mulaw_audio, self.ratecv_state_to_genesys = transcoder.ces_to_ulaw(
+            base64_audio, self.ratecv_state_to_genesys
+        )
+        if self.greeting_chunks is not None:
+            self.greeting_chunks.append(mulaw_audio)
+            self.greeting_bytes += len(mulaw_audio)
+            if self.greeting_bytes > MAX_GREETING_BYTES:
+                self.greeting_chunks = None
+        if self.greeting_skip_bytes:
+            skipped = min(self.greeting_skip_bytes, len(mulaw_audio))
+            self.greeting_skip_bytes -= skipped
+            mulaw_audio = mulaw_audio[skipped:]
+        if mulaw_audio:
+            self.get_audio_out_queue().put_nowait(mulaw_audio)
+
+    # Control message handlers. Implement your own logic here; handlers are
+    # tried in the order they are registered.
+
+    @_dispatcher.handler("text", session_output=True)
+    async def handle_text(self, data):
+        text = data["sessionOutput"]["text"]
+        redacted_text = redact(text)
+        logger.info(f"Received text from CES: {redacted_text}")
+        if "end_session" in text.lower():
+            logger.error(
+                "End Session as text in sessionOutput. It shouldn't be here as "
+                "this is text to be read to the customer. Calling disconnect in "
+                "Genesys with error returned"
+            )
+            await self.genesys_ws.send_disconnect(
+                "completed", params={"error": "no_params_error_1"}
+            )
+
+    @_dispatcher.handler("diagnosticInfo", session_output=True)
+    async def handle_diagnostic_info(self, data):
+        # Scanning every message and chunk is expensive on long turns, so it
+        # is sampled by DIAGNOSTIC_SCAN_SAMPLE_RATE (0 disables it).
+        if config.DIAGNOSTIC_SCAN_SAMPLE_RATE <= 0 or (
+            config.DIAGNOSTIC_SCAN_SAMPLE_RATE < 1
+            and random.random() >= config.DIAGNOSTIC_SCAN_SAMPLE_RATE
+        ):
+            return
+        for message in data["sessionOutput"]["diagnosticInfo"].get("messages", []):
+            chunks = message.get("chunks")
+            if chunks and "end_session" in chunks[0]:
+                logger.error(
+                    "End Session in turn complete. It shouldn't be here. "
+                    f"Received diagnostic message from CES: {message}. "
+                    "Calling disconnect in Genesys with error returned"
+                )
+                await self.genesys_ws.send_disconnect(
+                    "completed", params={"error": "no_params_error_2"}
+                )
+                return
+
+    @_dispatcher.handler("recognitionResult")
+    async def handle_recognition_result(self, data):
+        pass
+
+    @_dispatcher.handler("endSession")
+    async def handle_end_session(self, data):
+        logger.info(f"Received endSession from CES: {data}")
+        params = data["endSession"].get("metadata", {}).get("params", {})
+        if params:
+            logger.warning(f"Received params from CES: {params}")
+        await self.genesys_ws.send_disconnect("completed", params=params)
 
     async def pacer(self):
         logger.info("Starting audio pacer for Genesys")
+        audio_out_queue = self.get_audio_out_queue()
         try:
             while True:
-                audio_chunk = await self.audio_out_queue.get()
+                audio_chunk = await audio_out_queue.get()
                 await self.genesys_ws.websocket.send(audio_chunk)
-                self.audio_out_queue.task_done()
                 # Dynamically sleep based on the size of the audio chunk to ensure
                 # real-time pacing. The audio is 8000Hz PCMU, which is 1 byte per
                 # sample.
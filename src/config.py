@@ -23,3 +23,29 @@ GENESYS_API_KEY = os.getenv("GENESYS_API_KEY")
 AUTH_TOKEN_SECRET_PATH = os.getenv("AUTH_TOKEN_SECRET_PATH")
 GENESYS_CLIENT_SECRET = os.getenv("GENESYS_CLIENT_SECRET")
 LOG_UNREDACTED_DATA = os.getenv("LOG_UNREDACTED_DATA")
+# Resolve CES credentials, token and TLS context before the port accepts.
+PREWARM_ON_STARTUP = os.getenv("PREWARM_ON_STARTUP", "true") == "true"
+# Run on uvloop when it is installed (pip install uvloop).
+USE_UVLOOP = os.getenv("USE_UVLOOP", "false") == "true"
+# Play a cached greeting while CES connects (for deterministic greetings).
+GREETING_CACHE = os.getenv("GREETING_CACHE", "false") == "true"
+GREETING_CACHE_TTL_S = int(os.getenv("GREETING_CACHE_TTL_S", 3600))
+GREETING_CACHE_MAX_ENTRIES = int(os.getenv("GREETING_CACHE_MAX_ENTRIES", 100))
+GREETING_CACHE_VARIABLES = [
+    name.strip()
+    for name in os.getenv("GREETING_CACHE_VARIABLES", "").split(",")
+    if name.strip()
+]
+# Fraction of CES diagnosticInfo messages scanned for end_session (0 disables).
+DIAGNOSTIC_SCAN_SAMPLE_RATE = float(os.getenv("DIAGNOSTIC_SCAN_SAMPLE_RATE", 1.0))
+# Hand session state over to another instance on SIGTERM ("memory" or "file").
+SESSION_STORE = os.getenv("SESSION_STORE")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "/tmp/genesys-adapter-sessions")
+SESSION_STORE_TTL_S = int(os.getenv("SESSION_STORE_TTL_S", 300))
+# Aggregate upstream Genesys frames into messages of up to this many ms (0 = off).
+AUDIO_AGGREGATION_MS = int(os.getenv("AUDIO_AGGREGATION_MS", 0))
+AUDIO_AGGREGATION_DEADLINE_MS = int(
+    os.getenv("AUDIO_AGGREGATION_DEADLINE_MS", AUDIO_AGGREGATION_MS)
+)
+# Frame RMS (16-bit linear) that flushes immediately on speech onset (0 = off).
+AUDIO_ONSET_RMS = int(os.getenv("AUDIO_ONSET_RMS", 500))
@@ -0,0 +1,102 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Routes CES control messages to registered handlers."""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _lookup(table, message):
+    """Returns the earliest registered (order, type, handler) for a key of message."""
+    match = None
+    for key in message:
+        entry = table.get(key)
+        if entry is not None and (match is None or entry[0] < match[0]):
+            match = entry
+    return match
+
+
+class MessageDispatcher:
+    """A handler table for CES messages, built once per session class.
+
+    Handlers are registered with the `handler` decorator either for a key of
+    `sessionOutput` (text, diagnosticInfo, ...) or for a top-level key
+    (endSession, recognitionResult, ...). Routing looks up the keys of the
+    message in these tables, `sessionOutput` keys before top-level keys; when
+    a message carries several handled keys, the earliest registration wins.
+    """
+
+    def __init__(self):
+        self._session_output_handlers = {}
+        self._top_level_handlers = {}
+
+    def handler(self, message_type, session_output=False):
+        """Registers the decorated coroutine function for message_type."""
+
+        def register(func):
+            table = (
+                self._session_output_handlers
+                if session_output
+                else self._top_level_handlers
+            )
+            table[message_type] = (len(table), message_type, func)
+            return func
+
+        return register
+
+    def route(self, data):
+        """Returns the message type and handler for data, or (None, None)."""
+        session_output = data.get("sessionOutput")
+        match = None
+        if session_output:
+            match = _lookup(self._session_output_handlers, session_output)
+        if match is None:
+            match = _lookup(self._top_level_handlers, data)
+        if match is None:
+            return None, None
+        return match[1], match[2]
+
+
+class MessageStats:
+    """Per-session message counters and handler timings, by message type."""
+
+    __slots__ = ("counts", "seconds")
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+
+    def count(self, message_type):
+        self.counts[message_type] = self.counts.get(message_type, 0) + 1
+
+    def record(self, message_type, start):
+        """Counts a handled message and adds the time since start (perf_counter)."""
+        self.count(message_type)
+        self.seconds[message_type] = self.seconds.get(message_type, 0.0) + (
+            time.perf_counter() - start
+        )
+
+    def summary(self):
+        return ", ".join(
+            f"{message_type}={count}"
+            + (
+                f" ({self.seconds[message_type] * 1000:.1f} ms)"
+                if message_type in self.seconds
+                else ""
+            )
+            for message_type, count in sorted(self.counts.items())
+        )
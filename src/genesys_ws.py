@@ -15,14 +15,33 @@
 import asyncio
 import json
 import logging
+import time
 
+from . import config
+from .aggregator import FrameAggregator
 from .ces_ws import CESWS
+from .greeting_cache import greeting_cache
 from .redaction import redact
+from .session_store import session_store
 
 logger = logging.getLogger(__name__)
 
 
 class GenesysWS:
+    __slots__ = (
+        "websocket",
+        "ces_ws",
+        "last_server_sequence_number",
+        "last_client_sequence_number",
+        "client_session_id",
+        "conversation_id",
+        "input_variables",
+        "deployment_id",
+        "agent_id",
+        "ces_input_variables",
+        "aggregator",
+    )
+
     def __init__(self, websocket):
         self.websocket = websocket
         self.ces_ws = None
@@ -31,15 +50,30 @@ class GenesysWS:
         self.client_session_id = None
         self.conversation_id = None
         self.input_variables = None
+        self.deployment_id = None
+        self.agent_id = None
+        self.ces_input_variables = None
+        self.aggregator = None
 
     async def handle_connection(self):
         self.ces_ws = CESWS(self)
+        if config.AUDIO_AGGREGATION_MS:
+            self.aggregator = FrameAggregator(
+                self.ces_ws.send_audio,
+                config.AUDIO_AGGREGATION_MS,
+                config.AUDIO_AGGREGATION_DEADLINE_MS,
+                config.AUDIO_ONSET_RMS,
+            )
 
-        async for message in self.websocket:
-            if isinstance(message, str):
-                await self.handle_text_message(message)
-            elif isinstance(message, bytes):
-                await self.handle_binary_message(message)
+        try:
+            async for message in self.websocket:
+                if isinstance(message, str):
+                    await self.handle_text_message(message)
+                elif isinstance(message, bytes):
+                    await self.handle_binary_message(message)
+        finally:
+            if self.aggregator:
+                self.aggregator.close()
 
     async def handle_text_message(self, message):
         redacted_message = redact(message)
@@ -51,6 +85,8 @@ class GenesysWS:
             message_type = data.get("type")
 
             if message_type == "open":
+                resume_start = time.perf_counter()
+
                 parameters = data.get("parameters", {})
                 self.conversation_id = parameters.get("conversationId")
                 self.input_variables = parameters.get("inputVariables")
@@ -97,14 +133,33 @@ class GenesysWS:
                     )
                     return
 
-                await self.ces_ws.connect(self.agent_id, self.deployment_id)
-                asyncio.create_task(self.ces_ws.listen())
-                asyncio.create_task(self.ces_ws.pacer())
+                resume = None
+                if session_store:
+                    # Most calls have no stored state, so the lookup runs
+                    # alongside the CES connect rather than ahead of it.
+                    resume = asyncio.create_task(self.resume_from_store())
+
+                greeting = None
+                # A resumed call must not hear the greeting again, so the
+                # greeting cache has to wait for the lookup.
+                if greeting_cache and not (resume and await resume):
+                    greeting_key = greeting_cache.key(
+                        self.deployment_id or self.agent_id, self.ces_input_variables
+                    )
+                    greeting = greeting_cache.get(greeting_key)
+                    if not greeting:
+                        self.ces_ws.record_greeting(greeting_key)
+
+                if not greeting:
+                    await self.start_ces_session(resume)
 
                 logger.info(
                     "Genesys session opened for conversation ID: "
                     f"{self.conversation_id}"
                 )
+                if resume and resume.done() and resume.result():
+                    elapsed_ms = (time.perf_counter() - resume_start) * 1000
+                    logger.info(f"Session resumed from handoff in {elapsed_ms:.0f} ms")
 
                 custom_config_str = parameters.get("customConfig")
                 if custom_config_str:
@@ -149,6 +204,12 @@ class GenesysWS:
                 }
                 await self.send_message(opened_message)
 
+                if greeting:
+                    # Answer with the cached greeting while CES is still connecting.
+                    logger.info("Playing cached greeting to Genesys.")
+                    self.ces_ws.play_cached_greeting(greeting)
+                    await self.start_ces_session(resume)
+
             elif message_type == "ping":
                 logger.warning("PONG")
                 pong_message = {
@@ -203,6 +264,55 @@ class GenesysWS:
             logger.error(f"Error decoding JSON from Genesys: {message}")
             await self.send_disconnect("error", "Invalid JSON received")
 
+    def snapshot(self):
+        """Returns the compact state another instance needs to resume."""
+        return {
+            "seq": self.last_server_sequence_number,
+            "ces": self.ces_ws.snapshot(),
+        }
+
+    def restore(self, state):
+        self.last_server_sequence_number = state["seq"]
+        self.ces_ws.restore(state["ces"])
+
+    async def drain(self):
+        """Hands the session off to the store and closes both connections.
+
+        Genesys reconnects the call to another instance, which resumes it from
+        the stored state.
+        """
+        if self.ces_ws and self.ces_ws.session_id:
+            await session_store.save(self.client_session_id, self.snapshot())
+        await self.websocket.close(1012, "Service restart")
+        if self.ces_ws:
+            await self.ces_ws.close()
+
+    async def resume_from_store(self):
+        """Restores the state handed off by another instance, if there is one.
+
+        Returns:
+            True if the session was restored.
+        """
+        try:
+            state = await session_store.load(self.client_session_id)
+            if not state:
+                return False
+            logger.info(
+                "Resuming session handed off by another instance: "
+                f"{self.client_session_id}"
+            )
+            self.restore(state)
+            await session_store.delete(self.client_session_id)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to resume session from the store: {e}")
+            return False
+
+    async def start_ces_session(self, resume=None):
+        asyncio.create_task(self.ces_ws.pacer())
+        await self.ces_ws.connect(self.agent_id, self.deployment_id, resume)
+        asyncio.create_task(self.ces_ws.listen())
+
     async def send_disconnect(self, reason, params):
         logger.warning(f"Sending params message to Genesys: {params} type {type(params)}")
         output_variables = {}
@@ -234,7 +344,9 @@ class GenesysWS:
         return self.last_server_sequence_number
 
     async def handle_binary_message(self, message):
-        if self.ces_ws:
+        if self.aggregator:
+            await self.aggregator.add(message)
+        elif self.ces_ws:
             await self.ces_ws.send_audio(message)
 
     async def send_message(self, message):
@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Caches the agent greeting, already transcoded to PCMU, per deployment.
+
+When GREETING_CACHE is enabled, the first call for a deployment records the
+audio CES sends for its first turn. Later calls with the same deployment and
+input-variable signature play that audio to the caller as soon as the session
+is opened, while CES is still connecting and generating the live greeting.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Greetings longer than this are not cached (30 s of 8 kHz PCMU).
+MAX_GREETING_BYTES = 8000 * 30
+
+
+class GreetingCache:
+    """An LRU cache of greeting audio with a per-entry time to live."""
+
+    def __init__(self, ttl_s=3600, max_entries=100, key_variables=()):
+        self._ttl = ttl_s
+        self._max_entries = max_entries
+        self._key_variables = tuple(key_variables)
+        self._entries = OrderedDict()
+
+    def key(self, deployment_id, input_variables):
+        """Returns the cache key for a deployment and its input variables.
+
+        Only the variables listed in GREETING_CACHE_VARIABLES are part of the
+        signature, since those are the ones the greeting depends on.
+        """
+        input_variables = input_variables or {}
+        signature = json.dumps(
+            [input_variables.get(name) for name in self._key_variables],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+        return f"{deployment_id}#{digest}"
+
+    def get(self, key):
+        """Returns the cached greeting chunks for the key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expiry, chunks = entry
+        if expiry <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return chunks
+
+    def put(self, key, chunks):
+        """Stores the greeting chunks for the key, evicting the LRU entry."""
+        self._entries[key] = (time.monotonic() + self._ttl, tuple(chunks))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        logger.info(f"Cached greeting audio for {key}")
+
+
+greeting_cache = (
+    GreetingCache(
+        config.GREETING_CACHE_TTL_S,
+        config.GREETING_CACHE_MAX_ENTRIES,
+        config.GREETING_CACHE_VARIABLES,
+    )
+    if config.GREETING_CACHE
+    else None
+)
@@ -15,17 +15,23 @@
 import asyncio
 import http
 import logging
+import signal
 import sys
+import time
 
 import websockets
 
-from . import config
+from . import ces_ws, config
 from .auth import auth_provider
 from .genesys_ws import GenesysWS
+from .session_store import session_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sessions currently served by this instance, handed off on SIGTERM.
+live_sessions = set()
+
 
 def process_request(connection, request):
     """
@@ -54,7 +60,60 @@ async def handler(websocket):
     """
     logger.info(f"New connection from {websocket.remote_address}")
     genesys_ws = GenesysWS(websocket)
-    await genesys_ws.handle_connection()
+    live_sessions.add(genesys_ws)
+    try:
+        await genesys_ws.handle_connection()
+    finally:
+        live_sessions.discard(genesys_ws)
+
+
+async def drain():
+    """
+    Saves the state of every live session to the session store and closes
+    their connections so Genesys reconnects them to another instance.
+    """
+    sessions = list(live_sessions)
+    logger.info(f"Draining {len(sessions)} sessions for handoff.")
+    await sweep_session_store()
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(genesys_ws.drain() for genesys_ws in sessions), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Failed to hand off session: {result}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Handed off {len(sessions)} sessions in {elapsed_ms:.0f} ms")
+
+
+async def sweep_session_store():
+    """
+    Removes the stored state of calls that were handed off but never resumed.
+    """
+    try:
+        removed = await session_store.sweep()
+    except OSError as e:
+        logger.warning(f"Failed to sweep the session store: {e}")
+        return
+    if removed:
+        logger.info(f"Removed {removed} expired session states.")
+
+
+async def warm_up():
+    """
+    Resolves CES credentials, a first token and the TLS context before the port
+    starts accepting, so the first call on a freshly scaled-out instance does
+    not pay for them.
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        auth_provider.warm_up(), ces_ws.warm_up(), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Startup warm-up step failed: {result}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"Startup warm-up completed in {elapsed_ms:.0f} ms")
 
 
 async def main():
@@ -78,6 +137,12 @@ async def main():
     if config.GENESYS_CLIENT_SECRET:
         logger.info("Genesys signature verification is enabled.")
 
+    if config.PREWARM_ON_STARTUP:
+        await warm_up()
+
+    if session_store:
+        await sweep_session_store()
+
     logger.info(f"Starting WebSocket server on port {config.PORT}")
 
     # For older versions of `websockets`, we must catch the exception
@@ -85,11 +150,37 @@ async def main():
     async with websockets.serve(
         handler, "0.0.0.0", config.PORT, process_request=process_request
     ) as server:
-        await server.serve_forever()
+        if session_store:
+            # Cloud Run sends SIGTERM before stopping an instance on deploys.
+            stop = asyncio.Event()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+            await stop.wait()
+            # Stop accepting first so no session opens on this instance while
+            # the live ones are handed over, then drain the live ones.
+            server.close(close_connections=False)
+            await drain()
+        else:
+            await server.serve_forever()
+
+
+def run(coro):
+    """
+    Runs the given coroutine on uvloop when USE_UVLOOP is enabled and uvloop is
+    installed, falling back to the default asyncio event loop otherwise.
+    """
+    if config.USE_UVLOOP:
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("USE_UVLOOP is set but uvloop is not installed.")
+        else:
+            logger.info("Using uvloop event loop.")
+            return asyncio.run(coro, loop_factory=uvloop.new_event_loop)
+    return asyncio.run(coro)
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         logger.info("Server stopped manually.")
@@ -0,0 +1,171 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Stores session state so calls survive a rolling deploy.
+
+When SESSION_STORE is set, a draining instance (SIGTERM) saves the state of
+each live session under its Genesys session id and closes the Genesys
+connection. When Genesys reconnects the session to another instance, that
+instance loads the state, keeps the server sequence numbering and resumes the
+same CES session instead of starting a new conversation.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Base class for session state stores.
+
+    Subclasses implement `_write`, `_read`, `_remove` and `_sweep` on
+    serialized state. States older than `ttl_s` are treated as missing, and
+    `sweep` removes those of calls that hung up instead of reconnecting.
+    """
+
+    def __init__(self, ttl_s=300):
+        self._ttl = ttl_s
+
+    async def save(self, key, state):
+        """Serializes and stores the state dict for the session key."""
+        state = dict(state, t=time.time())
+        await self._write(key, json.dumps(state, separators=(",", ":")))
+
+    async def load(self, key):
+        """Returns the stored state dict for the session key, or None."""
+        payload = await self._read(key)
+        if payload is None:
+            return None
+        state = json.loads(payload)
+        if state.pop("t", 0) + self._ttl < time.time():
+            await self._remove(key)
+            return None
+        return state
+
+    async def delete(self, key):
+        """Removes the stored state for the session key, if any."""
+        await self._remove(key)
+
+    async def sweep(self):
+        """Removes every expired state and returns how many were removed."""
+        return await self._sweep(time.time() - self._ttl)
+
+
+class InMemorySessionStore(SessionStore):
+    """Keeps state in this process; only useful for reconnects to the same
+    instance and for local testing."""
+
+    def __init__(self, ttl_s=300):
+        super().__init__(ttl_s)
+        self._states = {}
+
+    async def _write(self, key, payload):
+        self._states[key] = payload
+
+    async def _read(self, key):
+        return self._states.get(key)
+
+    async def _remove(self, key):
+        self._states.pop(key, None)
+
+    async def _sweep(self, cutoff):
+        expired = [
+            key
+            for key, payload in self._states.items()
+            if json.loads(payload).get("t", 0) < cutoff
+        ]
+        for key in expired:
+            del self._states[key]
+        return len(expired)
+
+
+class FileSessionStore(SessionStore):
+    """Keeps one JSON file per session in a directory shared by instances."""
+
+    def __init__(self, path, ttl_s=300):
+        super().__init__(ttl_s)
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self._path, f"{name}.json")
+
+    def _write_file(self, key, payload):
+        file = self._file(key)
+        tmp_file = f"{file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_file, file)
+
+    def _read_file(self, key):
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def _sweep_files(self, cutoff):
+        # The modification time is the save time, so expired files are found
+        # without reading them. Leftover .tmp files of failed writes go too.
+        removed = 0
+        with os.scandir(self._path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Loaded or swept by another instance meanwhile.
+                    pass
+        return removed
+
+    async def _write(self, key, payload):
+        await asyncio.to_thread(self._write_file, key, payload)
+
+    async def _read(self, key):
+        return await asyncio.to_thread(self._read_file, key)
+
+    async def _remove(self, key):
+        await asyncio.to_thread(self._remove_file, key)
+
+    async def _sweep(self, cutoff):
+        return await asyncio.to_thread(self._sweep_files, cutoff)
+
+
+def create_session_store():
+    """Returns the store selected by SESSION_STORE, or None if disabled."""
+    if config.SESSION_STORE == "memory":
+        return InMemorySessionStore(config.SESSION_STORE_TTL_S)
+    if config.SESSION_STORE == "file":
+        return FileSessionStore(config.SESSION_STORE_PATH, config.SESSION_STORE_TTL_S)
+    if config.SESSION_STORE:
+        logger.error(f"Unknown SESSION_STORE: {config.SESSION_STORE}")
+    return None
+
+
+session_store = create_session_store()
@@ -0,0 +1,104 @@
+# Copyright 2025 Google LLC
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Audio transcoding between Genesys (8 kHz PCMU) and CES (16 kHz LINEAR16)."""
+
+import audioop
+import base64
+import binascii
+
+
+def ratecv_state_from_json(value):
+    """Rebuilds an audioop.ratecv() state from its JSON (list) form."""
+    if value is None:
+        return None
+    d, samples = value
+    return d, tuple(tuple(sample) for sample in samples)
+
+
+class AudioMessageBuffer:
+    """Per-session buffer that renders realtimeInput audio messages for CES.
+
+    The JSON envelope is written once into a preallocated bytearray and only
+    the base64 payload is rewritten per frame, so each frame costs only the
+    base64 bytes instead of a payload str, a dict, a json.dumps() copy and
+    its UTF-8 encoding. The rendered text is identical to json.dumps() of the
+    equivalent dict.
+    """
+
+    __slots__ = ("_buffer", "_view")
+
+    _PREFIX = b'{"realtimeInput": {"audio": "'
+    _SUFFIX = b'"}}'
+
+    def __init__(self):
+        # Allocated on the first frame, sized to it, so idle sessions stay small.
+        self._buffer = None
+        self._view = None
+
+    def _allocate(self, capacity):
+        self._buffer = bytearray(len(self._PREFIX) + capacity + len(self._SUFFIX))
+        self._buffer[: len(self._PREFIX)] = self._PREFIX
+        self._view = memoryview(self._buffer)
+
+    def render(self, linear_audio):
+        """Returns the realtimeInput message for the given LINEAR16 audio.
+
+        The message is a memoryview of UTF-8 text, to be sent as a text frame
+        with send(message, text=True). It is only valid until the next call.
+        """
+        payload = binascii.b2a_base64(linear_audio, newline=False)
+        start = len(self._PREFIX)
+        end = start + len(payload)
+        if self._buffer is None or end + len(self._SUFFIX) > len(self._buffer):
+            self._allocate(len(payload))
+        self._view[start:end] = payload
+        self._view[end : end + len(self._SUFFIX)] = self._SUFFIX
+        return self._view[: end + len(self._SUFFIX)]
+
+
+def ulaw_to_ces(mulaw_audio, ratecv_state, message_buffer):
+    """Converts 8 kHz PCMU to a CES realtimeInput message of 16 kHz LINEAR16.
+
+    Args:
+        mulaw_audio: The PCMU audio received from Genesys.
+        ratecv_state: The resampler state of the stream, or None.
+        message_buffer: The AudioMessageBuffer of the session.
+
+    Returns:
+        A tuple of the JSON message, as rendered by message_buffer, and the new
+        resampler state.
+    """
+    linear_audio_8k = audioop.ulaw2lin(mulaw_audio, 2)
+    linear_audio_16k, ratecv_state = audioop.ratecv(
+        linear_audio_8k, 2, 1, 8000, 16000, ratecv_state
+    )
+    return message_buffer.render(linear_audio_16k), ratecv_state
+
+
+def ces_to_ulaw(base64_audio, ratecv_state):
+    """Converts base64 16 kHz LINEAR16 to 8 kHz PCMU.
+
+    Args:
+        base64_audio: The base64 audio received from CES.
+        ratecv_state: The resampler state of the stream, or None.
+
+    Returns:
+        A tuple of the PCMU audio and the new resampler state.
+    """
+    linear_audio_16k = base64.b64decode(base64_audio)
+    linear_audio_8k, ratecv_state = audioop.ratecv(
+        linear_audio_16k, 2, 1, 16000, 8000, ratecv_state
+    )
+    return audioop.lin2ulaw(linear_audio_8k, 2), ratecv_state